@@ -1,13 +1,143 @@
 import os
+import re
+import csv
 import shutil
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 
+def _link_file(source_file: str, dest_file: str) -> None:
+    """
+    Hardlinks `source_file` to `dest_file`, replacing an existing destination
+    the same way a copy would.
+    """
+    try:
+        os.link(source_file, dest_file)
+    except FileExistsError:
+        os.remove(dest_file)
+        os.link(source_file, dest_file)
+
+def collect_squares(src_dir: str, dest_dir: str, patterns: list, frame_ranges: list = None,
+                    workers: int = 8, manifest_path: str = None, link: bool = True) -> dict:
+    """
+    Collects every file matching any of `patterns` (e.g. `square_5_5.png` or
+    `square_*_3.png`) from the directories named frames_<n> whose n falls in
+    one of `frame_ranges`, and places them in a destination directory as
+    `<filename>_frame_<n>.png`.
+
+    `src_dir` is scanned once and each selected frame directory is listed once,
+    instead of checking every file individually. With `link`, files are
+    hardlinked where the filesystem allows it, so they share data with the
+    frame dumps and must be treated as read-only; once a link fails (e.g.
+    across drives), and always without `link`, files are copied on a thread
+    pool.
+
+    Rather than logging each file, every call appends rows of source,
+    destination and method ("link", "copy", "missing" or "failed") to a CSV
+    manifest. It sits next to the destination directory rather than inside
+    it, so the folder only ever holds collected images.
+
+    Args:
+        src_dir (str): The root directory containing the frames directories.
+        dest_dir (str): The destination directory to store the collected files.
+        patterns (list): Filenames or fnmatch patterns to collect from each directory.
+        frame_ranges (list): Inclusive (start, end) frame ranges; None collects every frame.
+        workers (int): Threads used for copying.
+        manifest_path (str): Manifest to append to; defaults to `<dest_dir>_manifest.csv`.
+        link (bool): Hardlink instead of copying where possible.
+
+    Returns:
+        dict: Counts of linked, copied, missing and failed files.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+
+    # Scan the frames root once
+    frame_pattern = re.compile(r"frames_(\d+)$")
+    with os.scandir(src_dir) as entries:
+        frame_dirs = {
+            int(match.group(1)): entry.path
+            for entry in entries
+            if (match := frame_pattern.match(entry.name)) and entry.is_dir()
+        }
+    if frame_ranges is None:
+        frame_numbers = sorted(frame_dirs)
+    else:
+        frame_numbers = sorted(set().union(*(range(start, end + 1) for start, end in frame_ranges)))
+
+    # Literal names that aren't found are reported as missing, including for
+    # requested frames with no directory; globs just match what exists
+    literal_names = [p for p in patterns if not any(c in p for c in "*?[")]
+
+    jobs = []
+    missing = []
+    for i in frame_numbers:
+        frame_dir = frame_dirs.get(i)
+        if frame_dir is None:
+            missing.extend(os.path.join(src_dir, f"frames_{i}", filename) for filename in literal_names)
+            continue
+
+        with os.scandir(frame_dir) as entries:
+            names = {entry.name for entry in entries if entry.is_file()}
+        matched = {name for name in names if any(fnmatch.fnmatchcase(name, p) for p in patterns)}
+        for filename in sorted(matched):
+            jobs.append((os.path.join(frame_dir, filename), os.path.join(dest_dir, f"{filename}_frame_{i}.png")))
+        for filename in literal_names:
+            if filename not in names:
+                missing.append(os.path.join(frame_dir, filename))
+
+    # Hardlink until the filesystem refuses, then copy the remainder in parallel
+    linked = []
+    to_copy = []
+    can_link = link and hasattr(os, "link")
+    for source_file, dest_file in jobs:
+        if can_link:
+            try:
+                _link_file(source_file, dest_file)
+                linked.append((source_file, dest_file))
+                continue
+            except OSError:
+                can_link = False
+        to_copy.append((source_file, dest_file))
+
+    # A failed copy is recorded rather than aborting the batch, so the manifest
+    # still accounts for everything already linked or copied
+    def copy_job(job):
+        try:
+            shutil.copyfile(*job)
+            return True
+        except OSError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        copy_ok = list(pool.map(copy_job, to_copy))
+    copied = [job for job, ok in zip(to_copy, copy_ok) if ok]
+    failed = [job for job, ok in zip(to_copy, copy_ok) if not ok]
+
+    if manifest_path is None:
+        manifest_path = os.path.normpath(dest_dir) + "_manifest.csv"
+    write_header = not os.path.exists(manifest_path) or os.path.getsize(manifest_path) == 0
+    with open(manifest_path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(["source", "destination", "method"])
+        writer.writerows((source, dest, "link") for source, dest in linked)
+        writer.writerows((source, dest, "copy") for source, dest in copied)
+        writer.writerows((source, "", "missing") for source in missing)
+        writer.writerows((source, dest, "failed") for source, dest in failed)
+
+    counts = {"linked": len(linked), "copied": len(copied), "missing": len(missing), "failed": len(failed)}
+    print(f"Collected {len(linked) + len(copied)} files into {dest_dir} "
+          f"({counts['linked']} linked, {counts['copied']} copied, {counts['missing']} missing, "
+          f"{counts['failed']} failed). Manifest: {manifest_path}")
+    return counts
+
 def collect_square_files(src_dir: str, dest_dir: str, start: int, end: int, filename: str) -> None:
     """
     Collects specified files (e.g., `square_5_5.png`) from directories named frames_<n> 
     (where n is in the range [start, end]) and copies them into a destination directory.
+    Kept for existing callers; see collect_squares for several files and ranges at once.
 
     Args:
         src_dir (str): The root directory containing the frames directories.
@@ -16,25 +146,16 @@ def collect_square_files(src_dir: str, dest_dir: str, start: int, end: int, file
         end (int): The ending index for the range of directories.
         filename (str): The name of the file to collect from each directory.
     """
-    # Ensure the destination directory exists
-    os.makedirs(dest_dir, exist_ok=True)
-
-    for i in range(start, end + 1):
-        frame_dir = os.path.join(src_dir, f"frames_{i}")
-        source_file = os.path.join(frame_dir, filename)
-
-        if os.path.exists(source_file):
-            dest_file = os.path.join(dest_dir, f"{filename}_frame_{i}.png")
-            shutil.copy(source_file, dest_file)
-            print(f"Copied: {source_file} -> {dest_file}")
-        else:
-            print(f"File not found: {source_file}")
+    collect_squares(src_dir, dest_dir, [filename], [(start, end)], link=False)
 
 
 # Example usage:
 # Collect files named "square_5_5.png" from directories frames_1 to frames_5
 # and place them in a new directory "collected_squares"
 # collect_square_files("frames", "collected_squares", 1, 5, "square_5_5.png")
+#
+# Collect every cell of frames 0-999 and 5000-5999 in one pass
+# collect_squares("frames", "collected_squares", ["square_*_*.png"], [(0, 999), (5000, 5999)])
 
 # -------------------------------------------------------------------------------------------
 
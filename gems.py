@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+# Gem colours by label letter. GEM_LABELS is built from this one table, and a
+# label's index in it is its uint8 code in session logs, so add new colours at
+# the end to keep existing logs readable
+UNKNOWN_LABEL = "U"
+GEM_COLORS = {
+    "B": "blue",
+    "G": "green",
+    "O": "orange",
+    "P": "purple",
+    "R": "red",
+    "W": "white",
+    "Y": "yellow",
+}
+GEM_LABELS = UNKNOWN_LABEL + "".join(GEM_COLORS)
+COLOR_LABELS = {color: label for label, color in GEM_COLORS.items()}
+
+
+def load_reference_images(folder: str = "dataset") -> dict:
+    """
+    Loads one reference image per gem from {gem_color}_example/ folders and
+    returns a dictionary mapping each gem's label letter (e.g. "B" for blue)
+    to the reference's mean BGR colour.
+
+    Raises:
+        ValueError: If a folder's colour has no entry in GEM_COLORS.
+    """
+    import cv2  # only needed here, so reading logs works without OpenCV
+
+    reference_colors = {}
+    for example_folder in sorted(os.listdir(folder)):
+        if not example_folder.endswith("_example"):
+            continue
+        input_folder = os.path.join(folder, example_folder)
+        gem_files = [f for f in os.listdir(input_folder) if f.endswith(".png")]
+        if len(gem_files) == 0:
+            continue
+
+        gem_color = example_folder.replace("_example", "")
+        if gem_color not in COLOR_LABELS:
+            raise ValueError(f"No label letter for gem colour '{gem_color}'; add it to GEM_COLORS")
+        reference_img = cv2.imread(os.path.join(input_folder, gem_files[0]))
+        reference_colors[COLOR_LABELS[gem_color]] = reference_img.reshape(-1, 3).mean(axis=0)
+    return reference_colors
+
+
+def identify_gem_type(square_img, reference_colors: dict) -> str:
+    """
+    Labels a cell with the gem whose reference mean colour is nearest to the
+    cell's mean colour. Returns UNKNOWN_LABEL when there are no references.
+
+    This is a rough baseline: captured cells include the board background,
+    which the references don't, so it hasn't been validated on live frames.
+    """
+    if not reference_colors:
+        return UNKNOWN_LABEL
+    mean_color = square_img.reshape(-1, 3).mean(axis=0)
+    return min(reference_colors, key=lambda label: np.linalg.norm(mean_color - reference_colors[label]))
@@ -1,12 +1,18 @@
 import time
 import ctypes
 import os
+import argparse
+from typing import Optional
 
 import cv2
 import numpy as np
 import mss
 import pygetwindow as gw
 
+from gems import UNKNOWN_LABEL
+from session_log import SessionLogWriter, labels_to_grid
+from settle import SettleDetector, QUIET_PERIOD
+
 def get_scale_factor() -> float:
     """
     Returns the Windows scale factor for high-DPI devices.
@@ -74,9 +80,6 @@ def create_grid_squares(grid_region: dict, grid_size: int = 8) -> list:
             })
     return squares
 
-def identify_gem_type() -> str:
-    pass
-
 def extract_gem_grabcut(square_img):
     """
     Uses OpenCV's GrabCut algorithm to extract the foreground gem
@@ -106,30 +109,52 @@ def capture_and_process_frame(
     grid_region: dict,
     grid_squares: list,
     video_out: cv2.VideoWriter,
-    frame_count: int
-) -> None:
+    frame_count: int,
+    save_squares: bool = True,
+    settle_detector: SettleDetector = None,
+    capture_time: float = None
+) -> Optional[list]:
     """
     Captures a screenshot of the grid region, identifies each gem in
     the 8x8 cells, draws the gem label onto the frame, and writes
-    the frame to the video output.
+    the frame to the video output. Returns the 8x8 grid of gem labels,
+    or None when a settle detector is given and this frame is not its
+    "board stable" event.
+
+    Gems are labelled "U" (unknown) until a classifier is wired in. With
+    `save_squares` each cell is also dumped to frames/frames_<n>/, and
+    `video_out` may be None to skip the video.
+
+    With a settle detector, frames are only classified on its "board
+    stable" event; other frames go to the video unlabelled. The detector
+    sees the frame at `capture_time` (defaults to now), so callers that
+    log the board can pass in the timestamp they record.
     """
 
-    # Create the parent directory for frames if it doesn't exist
-    frames_dir = "frames"
-    if not os.path.exists(frames_dir):
-        os.makedirs(frames_dir)
-
-    # Create a subdirectory for the current frame
-    frame_dir = os.path.join(frames_dir, f"frames_{frame_count}")
-    if not os.path.exists(frame_dir):
-        os.makedirs(frame_dir)
-
-    
+    if capture_time is None:
+        capture_time = time.time()
     screenshot = sct.grab(grid_region)
     img = np.array(screenshot)
 
     img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
 
+    # Skip classification while the board is still animating
+    if settle_detector is not None and not settle_detector.update(img, capture_time):
+        if video_out is not None:
+            video_out.write(img)
+        return None
+
+    if save_squares:
+        # Create the parent directory for frames if it doesn't exist
+        frames_dir = "frames"
+        if not os.path.exists(frames_dir):
+            os.makedirs(frames_dir)
+
+        # Create a subdirectory for the current frame
+        frame_dir = os.path.join(frames_dir, f"frames_{frame_count}")
+        if not os.path.exists(frame_dir):
+            os.makedirs(frame_dir)
+
     grid_size = 8
     color_labels = [["" for _ in range(grid_size)] for _ in range(grid_size)]
     some_weird_factor = 64 # 2 makes it infinitely small, 4 make a square half the size of the original. Etc etc increasing this number from 2 to infinity probably will equate to the box being the same as the original
@@ -167,14 +192,18 @@ def capture_and_process_frame(
         #processed_img = extract_gem_grabcut(square_img)
         
         # Save the cropped square image
-        square_filename = os.path.join(frame_dir, f"square_{row}_{col}.png")
-        cv2.imwrite(square_filename, square_img)
+        if save_squares:
+            square_filename = os.path.join(frame_dir, f"square_{row}_{col}.png")
+            cv2.imwrite(square_filename, square_img)
         
         #cv2.rectangle(img, top_left, bottom_right, (0, 255, 0), 1)
 
         # Identify gem type
         #gem_type = identify_gem_type(square_img, reference_images)
-        color_labels[row][col] = "U"
+        color_labels[row][col] = UNKNOWN_LABEL
+
+    if video_out is None:
+        return color_labels
 
     # Draw labels on the image
     for square in grid_squares:
@@ -208,13 +237,26 @@ def capture_and_process_frame(
     # Write the labeled frame to the video file
     video_out.write(img)
 
+    return color_labels
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Record and label a Bejeweled 3 session.")
+    parser.add_argument("--log", metavar="PATH",
+                        help="write a compact board-state log to PATH (see session_log.py)")
+    parser.add_argument("--no-video", action="store_true", help="don't record game_recording.avi")
+    parser.add_argument("--no-squares", action="store_true", help="don't dump cell images to frames/")
+    parser.add_argument("--quiet-period", type=float, default=QUIET_PERIOD,
+                        help="seconds without motion before the board counts as stable")
+    parser.add_argument("--every-frame", action="store_true",
+                        help="classify every frame instead of waiting for the board to settle")
+    return parser.parse_args()
+
 def main():
     """
     Main function that sets up the environment, locates the Bejeweled 3 window,
-    initializes the video writer, and runs the capture loop.
+    initializes the video writer and session log, and runs the capture loop.
     """
-    # Load reference gem images
-    # reference_gems = load_reference_images("gems")
+    args = parse_args()
 
     # Get high-DPI scaling factor
     scale_factor = get_scale_factor()
@@ -238,8 +280,16 @@ def main():
 
     # Set up video writer
     fps = 24
-    fourcc = cv2.VideoWriter_fourcc(*"XVID")
-    out = cv2.VideoWriter("game_recording.avi", fourcc, fps, (grid_region["width"], grid_region["height"]))
+    out = None
+    if not args.no_video:
+        fourcc = cv2.VideoWriter_fourcc(*"XVID")
+        out = cv2.VideoWriter("game_recording.avi", fourcc, fps, (grid_region["width"], grid_region["height"]))
+
+    # Set up session log
+    session_log = SessionLogWriter(args.log) if args.log else None
+
+    # Set up settle detection so boards are only classified once they stop moving
+    settle_detector = None if args.every_frame else SettleDetector(grid_size=8, quiet_period=args.quiet_period)
 
     # Capture loop
     with mss.mss() as sct:
@@ -252,7 +302,16 @@ def main():
                 start_time = time.time()
 
                 # Capture and process the current frame
-                capture_and_process_frame(sct, grid_region, grid_squares, out, frame_count)
+                color_labels = capture_and_process_frame(
+                    sct, grid_region, grid_squares, out, frame_count,
+                    save_squares=not args.no_squares,
+                    settle_detector=settle_detector, capture_time=start_time
+                )
+                if color_labels is not None:
+                    if settle_detector is not None and settle_detector.last_latency is not None:
+                        print(f"Board stable: {settle_detector.last_latency * 1000:.0f} ms after last motion")
+                    if session_log is not None:
+                        session_log.write(labels_to_grid(color_labels), start_time, frame_number=frame_count)
 
                 # Calculate and print live FPS
                 frame_time = time.time() - start_time
@@ -270,7 +329,12 @@ def main():
             print("Recording stopped by user.")
         finally:
             print("Cleaning up...")
-            out.release()
+            if out is not None:
+                out.release()
+            if session_log is not None:
+                session_log.close()
+            if settle_detector is not None:
+                settle_detector.print_stats()
             cv2.destroyAllWindows()
 
 if __name__ == "__main__":
@@ -1,93 +1,355 @@
 import pygame
 import sys
 import random
-import math
+import argparse
+import time
+from collections import deque
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((800, 600))
-    pygame.display.set_caption("Game 2 - Repelled by Mouse")
-    clock = pygame.time.Clock()
-
-    ball_radius = 20
-    ball_x = random.randint(ball_radius, 800 - ball_radius)
-    ball_y = random.randint(ball_radius, 600 - ball_radius)
-    ball_dx = 4
-    ball_dy = 0
-    gravity = 0.3
-    bounce_energy_loss = 0.8
-
-    hue = 0
-    trail_surface = pygame.Surface((800, 600), pygame.SRCALPHA)
-
-    repel_strength = 1000  # tweak this to feel right
-    min_distance = 20       # clamp to avoid insane speeds
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+import numpy as np
+
+import runtime
+
+# Config
+WIDTH = 800
+HEIGHT = 600
+BALL_RADIUS = 20
+GRAVITY = 0.3
+BOUNCE_ENERGY_LOSS = 0.8
+REPEL_STRENGTH = 1000  # tweak this to feel right
+MIN_DISTANCE = 20      # clamp to avoid insane speeds
+COLLISION_ITERATIONS = 8  # overlap relaxation passes per step; more keeps big piles from squashing
+
+TRAIL_FRAMES = 45       # frames for a (0, 0, 0, 20) fade to take a ball's colour to black
+
+BENCHMARK_COUNTS = (1, 10, 100, 1000, 5000, 10000)
+BENCHMARK_RADIUS = 2
+BENCHMARK_STEPS = 400  # long enough for the pile to settle before overlap is measured
+
+
+class ParticleSystem:
+    """
+    Structure-of-arrays ball simulation. Positions and velocities live in
+    flat NumPy arrays so gravity, mouse repulsion, integration and wall
+    bounces run as whole-array operations. Ball-ball collisions are found
+    with a uniform-grid spatial hash whose cells are one ball diameter wide.
+    """
 
+    def __init__(self, x, y, dx, dy, radius=BALL_RADIUS, width=WIDTH, height=HEIGHT):
+        self.x = np.asarray(x, dtype=np.float64).copy()
+        self.y = np.asarray(y, dtype=np.float64).copy()
+        self.dx = np.asarray(dx, dtype=np.float64).copy()
+        self.dy = np.asarray(dy, dtype=np.float64).copy()
+        self.radius = radius
+        self.width = width
+        self.height = height
+
+        self.cell_size = 2 * radius
+        self.grid_cols = max(1, int(np.ceil(width / self.cell_size)))
+        self.grid_rows = max(1, int(np.ceil(height / self.cell_size)))
+
+    @classmethod
+    def random(cls, count, radius=BALL_RADIUS, width=WIDTH, height=HEIGHT, rng=None):
+        """
+        Scatters `count` balls uniformly inside the walls. A single ball
+        starts exactly like the original minigame: moving right at 4 px/frame.
+        """
+        if count == 1:
+            return cls(
+                [random.randint(radius, width - radius)],
+                [random.randint(radius, height - radius)],
+                [4.0], [0.0], radius, width, height
+            )
+
+        rng = rng if rng is not None else np.random.default_rng()
+        return cls(
+            rng.uniform(radius, width - radius, count),
+            rng.uniform(radius, height - radius, count),
+            rng.uniform(-4, 4, count),
+            np.zeros(count),
+            radius, width, height
+        )
+
+    def __len__(self):
+        return len(self.x)
+
+    def step(self, mouse_pos):
+        """
+        Advances the simulation by one frame.
+        """
+        self.apply_forces(mouse_pos)
+        self.integrate()
+        self.collide_walls()
+        if len(self) > 1:
+            self.collide_balls()
+
+    def apply_forces(self, mouse_pos):
         # Apply gravity
-        ball_dy += gravity
+        self.dy += GRAVITY
+
+        # Vector from mouse to each ball
+        dx = self.x - mouse_pos[0]
+        dy = self.y - mouse_pos[1]
+        distance_sq = np.maximum(dx ** 2 + dy ** 2, 1e-9)
+        distance = np.maximum(np.sqrt(distance_sq), MIN_DISTANCE)
 
-        # Get mouse position
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        # Apply repelling force along the normalized vector: F = k / r^2
+        force = REPEL_STRENGTH / distance_sq
+        self.dx += dx / distance * force
+        self.dy += dy / distance * force
 
-        # Vector from mouse to ball
-        dx = ball_x - mouse_x
-        dy = ball_y - mouse_y
+    def integrate(self):
+        self.x += self.dx
+        self.y += self.dy
+
+    def collide_walls(self):
+        r = self.radius
+
+        left = self.x - r <= 0
+        right = ~left & (self.x + r >= self.width)
+        self.x[left] = r
+        self.x[right] = self.width - r
+        self.dx[left | right] *= -BOUNCE_ENERGY_LOSS
+
+        bottom = self.y + r >= self.height
+        top = ~bottom & (self.y - r <= 0)
+        self.y[bottom] = self.height - r
+        self.y[top] = r
+        self.dy[bottom | top] *= -BOUNCE_ENERGY_LOSS
+
+    def candidate_pairs(self):
+        """
+        Returns index arrays (i, j) of every ball pair that shares a grid cell
+        or sits in adjacent cells. Balls are sorted by cell key once, then each
+        cell is matched against itself and four forward neighbours so every
+        neighbouring cell pair is visited exactly once.
+        """
+        cols, rows = self.grid_cols, self.grid_rows
+        cx = np.clip((self.x // self.cell_size).astype(np.int64), 0, cols - 1)
+        cy = np.clip((self.y // self.cell_size).astype(np.int64), 0, rows - 1)
+        keys = cy * cols + cx
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        pairs_i = []
+        pairs_j = []
+        for ox, oy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+            nx = cx[order] + ox
+            ny = cy[order] + oy
+            valid = (nx >= 0) & (nx < cols) & (ny < rows)
+            neighbour_keys = np.where(valid, ny * cols + nx, -1)
+
+            start = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+            end = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+            counts = np.where(valid, end - start, 0)
+            total = int(counts.sum())
+            if total == 0:
+                continue
+
+            # Expand each [start, end) range into explicit sorted-space indices
+            a = np.repeat(np.arange(len(order)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            b = np.repeat(start, counts) + offsets
+
+            if ox == 0 and oy == 0:
+                keep = b > a
+                a, b = a[keep], b[keep]
+
+            pairs_i.append(order[a])
+            pairs_j.append(order[b])
+
+        if not pairs_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+    def contacts(self, i, j):
+        """
+        Narrows candidate pairs down to overlapping ones. Returns the pair
+        indices, the unit contact normal from i to j and the overlap depth.
+        """
+        dx = self.x[j] - self.x[i]
+        dy = self.y[j] - self.y[i]
         distance_sq = dx ** 2 + dy ** 2
-        distance = max(math.sqrt(distance_sq), min_distance)
-
-        # Normalize vector
-        nx = dx / distance
-        ny = dy / distance
-
-        # Apply repelling force: F = k / r^2
-        force = repel_strength / distance_sq
-        ball_dx += nx * force
-        ball_dy += ny * force
-
-        # Move ball
-        ball_x += ball_dx
-        ball_y += ball_dy
-
-        # Bounce off walls
-        if ball_x - ball_radius <= 0:
-            ball_x = ball_radius
-            ball_dx *= -1
-            ball_dx *= bounce_energy_loss
-        elif ball_x + ball_radius >= 800:
-            ball_x = 800 - ball_radius
-            ball_dx *= -1
-            ball_dx *= bounce_energy_loss
-        if ball_y + ball_radius >= 600:
-            ball_y = 600 - ball_radius
-            ball_dy *= -1
-            ball_dy *= bounce_energy_loss
-        elif ball_y - ball_radius <= 0:
-            ball_y = ball_radius
-            ball_dy *= -1
-            ball_dy *= bounce_energy_loss
+        diameter = 2 * self.radius
+
+        hit = distance_sq < diameter ** 2
+        i, j, dx, dy = i[hit], j[hit], dx[hit], dy[hit]
+
+        # Coincident balls are pushed apart along x
+        distance = np.sqrt(distance_sq[hit])
+        coincident = distance == 0
+        safe_distance = np.where(coincident, 1.0, distance)
+        nx = np.where(coincident, 1.0, dx / safe_distance)
+        ny = np.where(coincident, 0.0, dy / safe_distance)
+
+        return i, j, nx, ny, diameter - distance
+
+    def clamp_to_walls(self):
+        np.clip(self.x, self.radius, self.width - self.radius, out=self.x)
+        np.clip(self.y, self.radius, self.height - self.radius, out=self.y)
+
+    def collide_balls(self):
+        """
+        Pushes overlapping balls apart with a few relaxation passes, then lets
+        the net push each ball received cancel the velocity it had against that
+        push. Resting contacts thereby absorb the speed gravity adds each step
+        instead of letting balls sink into each other. Pairs are re-hashed
+        every pass because the pushes move balls, and walls are enforced inside
+        the loop so the floor can't shove the bottom row back into the pile
+        afterwards.
+        """
+        start_x = self.x.copy()
+        start_y = self.y.copy()
+
+        for _ in range(COLLISION_ITERATIONS):
+            ci, cj, nx, ny, overlap = self.contacts(*self.candidate_pairs())
+            if len(ci) == 0:
+                break
+
+            # The upper ball of a stacked pair takes most of the push, so the
+            # floor's support travels up the pile instead of diffusing through it
+            lower_share = 0.5 * (1 - np.abs(ny))
+            share_i = np.where(ny > 0, 1 - lower_share, lower_share)
+            share_j = 1 - share_i
+
+            # Each ball moves by the average of its contacts' pushes; summing
+            # them instead overshoots in dense piles
+            contacts = np.bincount(ci, minlength=len(self)) + np.bincount(cj, minlength=len(self))
+            weight = 1 / np.maximum(contacts, 1)
+            self.x += (np.bincount(cj, weights=nx * overlap * share_j, minlength=len(self))
+                       - np.bincount(ci, weights=nx * overlap * share_i, minlength=len(self))) * weight
+            self.y += (np.bincount(cj, weights=ny * overlap * share_j, minlength=len(self))
+                       - np.bincount(ci, weights=ny * overlap * share_i, minlength=len(self))) * weight
+            self.clamp_to_walls()
+
+        # Balls lose the velocity they were driving into each other with, but
+        # pushes never speed a ball up; contacts are inelastic and can't pump
+        # energy into the pile
+        self.dx = _absorb(self.dx, self.x - start_x)
+        self.dy = _absorb(self.dy, self.y - start_y)
+
+    def max_overlap(self):
+        """
+        Returns the deepest ball-ball overlap in pixels (0 if none touch).
+        """
+        ci, _, _, _, overlap = self.contacts(*self.candidate_pairs())
+        return float(overlap.max()) if len(ci) else 0.0
+
+
+def _absorb(velocity, push):
+    """
+    Adds `push` to `velocity` without letting it overshoot past zero, so a
+    push can cancel motion against it but never creates motion of its own.
+    """
+    return np.where(
+        push < 0,
+        np.maximum(velocity + push, np.minimum(velocity, 0)),
+        np.minimum(velocity + push, np.maximum(velocity, 0))
+    )
+
+
+def benchmark(counts=BENCHMARK_COUNTS, steps=BENCHMARK_STEPS, radius=BENCHMARK_RADIUS):
+    """
+    Runs the simulation headless for each ball count and prints steps per
+    second, plus the deepest ball-ball overlap afterwards in radii. A solver
+    that is fast because it doesn't separate balls shows up in that column.
+    """
+    rng = np.random.default_rng(0)
+    mouse_pos = (WIDTH / 2, -HEIGHT)  # far enough away that no ball is flung off
+
+    print(f"{'balls':>8} {'steps/s':>10} {'ball-steps/s':>14} {'overlap/r':>10}")
+    for count in counts:
+        system = ParticleSystem.random(count, radius=radius, rng=rng)
+        system.step(mouse_pos)  # warm-up
+
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            system.step(mouse_pos)
+        elapsed = time.perf_counter() - start_time
+
+        steps_per_second = steps / elapsed if elapsed > 0 else float("inf")
+        overlap = system.max_overlap() / radius
+        print(f"{count:>8} {steps_per_second:>10.1f} {steps_per_second * count:>14.0f} {overlap:>10.2f}")
+
+
+class BouncyBall(runtime.Game):
+    """
+    Draws the balls over a fading trail. The trail only needs fading where a
+    ball has been during the last TRAIL_FRAMES frames (older pixels are already
+    black), so only that area is faded and presented instead of the full window.
+    """
+    title = "Game 2 - Repelled by Mouse"
+    size = (WIDTH, HEIGHT)
+
+    def __init__(self, system):
+        super().__init__()
+        self.system = system
+        self.prev_x = system.x.copy()
+        self.prev_y = system.y.copy()
+        self.hue = 0
+        self.ball_color = pygame.Color(0)
+        self.trail_surface = None
+        self.recent_rects = deque(maxlen=TRAIL_FRAMES)
+
+    def setup(self, screen):
+        # The fade layer never changes, so fill it once rather than every frame
+        self.trail_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+        self.trail_surface.fill((0, 0, 0, 20))
+
+    def update(self, dt):
+        self.prev_x[:] = self.system.x
+        self.prev_y[:] = self.system.y
+        self.system.step(pygame.mouse.get_pos())
 
         # Update color
-        hue = (hue + 1) % 360
-        ball_color = pygame.Color(0)
-        ball_color.hsva = (hue, 100, 100, 100)
+        self.hue = (self.hue + 1) % 360
+
+    def render(self, screen, alpha):
+        system = self.system
+        radius = system.radius
+        x = (self.prev_x + (system.x - self.prev_x) * alpha).astype(int)
+        y = (self.prev_y + (system.y - self.prev_y) * alpha).astype(int)
 
-        # Draw trail
-        trail_surface.fill((0, 0, 0, 20))
-        screen.blit(trail_surface, (0, 0))
+        # Bounding rect of everything drawn this frame
+        ball_rect = pygame.Rect(
+            x.min() - radius, y.min() - radius,
+            x.max() - x.min() + 2 * radius + 1, y.max() - y.min() + 2 * radius + 1
+        ).clip(screen.get_rect())
 
-        # Draw ball
-        pygame.draw.circle(screen, ball_color, (int(ball_x), int(ball_y)), ball_radius)
+        # Draw trail over the area touched by recent frames
+        trail_rect = ball_rect.unionall(list(self.recent_rects)) if self.recent_rects else ball_rect
+        screen.blit(self.trail_surface, trail_rect, trail_rect)
+        self.recent_rects.append(ball_rect)
 
-        pygame.display.flip()
-        clock.tick(60)
+        # Draw balls, fanning the hue out so neighbours are distinguishable
+        for index, (bx, by) in enumerate(zip(x, y)):
+            self.ball_color.hsva = ((self.hue + index * 7) % 360, 100, 100, 100)
+            pygame.draw.circle(screen, self.ball_color, (bx, by), radius)
+
+        return [trail_rect]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Balls repelled by the mouse.")
+    parser.add_argument("--balls", type=int, default=1, help="number of balls to simulate")
+    parser.add_argument("--radius", type=int, default=BALL_RADIUS, help="ball radius in pixels")
+    parser.add_argument("--step-benchmark", action="store_true",
+                        help="run the simulation headless and report steps per second per ball count")
+    args = runtime.add_arguments(parser).parse_args()
+    if args.balls < 1:
+        parser.error("--balls must be at least 1")
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.step_benchmark:
+        benchmark()
+        return
 
-    pygame.quit()
+    game = BouncyBall(ParticleSystem.random(args.balls, radius=args.radius))
+    runtime.run(game, benchmark=args.benchmark, frames=args.frames)
     sys.exit()
 
 if __name__ == "__main__":
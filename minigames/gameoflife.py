@@ -5,6 +5,8 @@ from scipy.signal import convolve2d
 import colorsys
 import math
 
+import runtime
+
 # Config
 CELL_SIZE = 10
 GRID_WIDTH = 160
@@ -91,16 +93,6 @@ def draw_legend(surface):
         surface.blit(rendered, (10, 10 + i * 20))
 
 
-def init_pygame_and_ui():
-    pygame.init()
-    screen_size = (GRID_WIDTH * CELL_SIZE + UI_WIDTH_PIXELS, GRID_HEIGHT * CELL_SIZE)
-    screen = pygame.display.set_mode(screen_size)
-    pygame.display.set_caption("Conway's Game of Life with pygame_gui")
-    clock = pygame.time.Clock()
-    manager = pygame_gui.UIManager(screen_size)
-    return screen, manager, clock
-
-
 def create_ui_elements(manager):
     label_x = GRID_WIDTH * CELL_SIZE + 20
     element_x = label_x + 180
@@ -224,54 +216,61 @@ def draw_fill_preview(screen, ui, mouse_pos):
                         pygame.draw.rect(screen, (100, 100, 255), rect, width=1)
 
 
-def main():
-    screen, manager, clock = init_pygame_and_ui()
-    ui = create_ui_elements(manager)
-
-    grid = np.random.choice([0, 1], size=(GRID_HEIGHT, GRID_WIDTH), p=[0.8, 0.2])
-    birth_rules, survive_rules = parse_rule(RULE_STRING)
-
-    fps = INITIAL_FPS
-    sim_interval = 1000 / fps
-    time_since_last_step = 0
-    paused = False
-    step_requested = False
-    mouse_down = False
-    drawing_value = 1
-    psychedelic_mode = False
-    running = True
-    mouse_pos = (0, 0)
-
-
-    while running:
-        time_delta = clock.tick(60)
-        time_since_last_step += time_delta
-        mouse_pos = pygame.mouse.get_pos()
-
-
-        for event in pygame.event.get():
-            manager.process_events(event)
-            running, paused, step_requested, psychedelic_mode, grid, mouse_down, drawing_value, birth_rules, survive_rules = handle_input(
-                event, ui, grid, paused, step_requested, psychedelic_mode, mouse_down, drawing_value, birth_rules, survive_rules
-            )
-
-        manager.update(time_delta / 1000.0)
-
-        if (not paused and time_since_last_step >= sim_interval) or (paused and step_requested):
-            grid = update_grid(grid, birth_rules, survive_rules)
-            time_since_last_step = 0
-            step_requested = False
-
-        fps = int(ui['slider'].get_current_value())
-        sim_interval = 1000 / fps
-
-        draw_grid(screen, grid, psychedelic_mode)
-        manager.draw_ui(screen)
+class GameOfLife(runtime.Game):
+    title = "Conway's Game of Life with pygame_gui"
+    size = (GRID_WIDTH * CELL_SIZE + UI_WIDTH_PIXELS, GRID_HEIGHT * CELL_SIZE)
+
+    def __init__(self):
+        super().__init__()
+        self.grid = np.random.choice([0, 1], size=(GRID_HEIGHT, GRID_WIDTH), p=[0.8, 0.2])
+        self.birth_rules, self.survive_rules = parse_rule(RULE_STRING)
+
+        self.sim_interval = 1000 / INITIAL_FPS
+        self.time_since_last_step = 0
+        self.paused = False
+        self.step_requested = False
+        self.mouse_down = False
+        self.drawing_value = 1
+        self.psychedelic_mode = False
+
+        self.manager = None
+        self.ui = None
+
+    def setup(self, screen):
+        self.manager = pygame_gui.UIManager(self.size)
+        self.ui = create_ui_elements(self.manager)
+
+    def handle_event(self, event):
+        self.manager.process_events(event)
+        (self.running, self.paused, self.step_requested, self.psychedelic_mode, self.grid,
+         self.mouse_down, self.drawing_value, self.birth_rules, self.survive_rules) = handle_input(
+            event, self.ui, self.grid, self.paused, self.step_requested, self.psychedelic_mode,
+            self.mouse_down, self.drawing_value, self.birth_rules, self.survive_rules
+        )
+
+    def update(self, dt):
+        self.time_since_last_step += dt * 1000
+        self.manager.update(dt)
+
+        if (not self.paused and self.time_since_last_step >= self.sim_interval) or (self.paused and self.step_requested):
+            self.grid = update_grid(self.grid, self.birth_rules, self.survive_rules)
+            self.time_since_last_step = 0
+            self.step_requested = False
+
+        fps = int(self.ui['slider'].get_current_value())
+        self.sim_interval = 1000 / fps
+
+    def render(self, screen, alpha):
+        draw_grid(screen, self.grid, self.psychedelic_mode)
+        self.manager.draw_ui(screen)
         draw_legend(screen)
-        draw_fill_preview(screen, ui, mouse_pos)
-        pygame.display.flip()
+        draw_fill_preview(screen, self.ui, pygame.mouse.get_pos())
+        return None
+
 
-    pygame.quit()
+def main():
+    args = runtime.parse_args("Conway's Game of Life.")
+    runtime.run(GameOfLife(), benchmark=args.benchmark, frames=args.frames)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+import os
+import time
+import argparse
+from collections import deque
+
+import pygame
+
+# Config
+UPDATE_RATE = 60           # fixed simulation steps per second
+MAX_FRAME_TIME = 0.25      # clamp long frames so a stall doesn't trigger hundreds of catch-up steps
+PROFILER_WINDOW = 120      # frames kept for the overlay statistics
+BENCHMARK_FRAMES = 1000
+OVERLAY_KEY = pygame.K_F3
+
+OVERLAY_TEXT = (230, 230, 230)
+OVERLAY_BACKGROUND = (0, 0, 0, 180)
+
+
+class Game:
+    """
+    Base class for minigames driven by `run`. Subclasses override the hooks
+    they need; `render` returns the list of rects it changed, or None when
+    the whole screen should be presented.
+    """
+    title = "Minigame"
+    size = (800, 600)
+
+    def __init__(self):
+        self.running = True
+
+    def setup(self, screen):
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        pass
+
+    def render(self, screen, alpha):
+        return None
+
+
+class FrameProfiler:
+    """
+    Records per-frame update, render and present timings in seconds, and the
+    frame time: the wall-clock gap between consecutive frame starts, so frame
+    limiting and vsync are included. With `window=None` every frame is kept,
+    which is what benchmarks want.
+    """
+
+    def __init__(self, window=PROFILER_WINDOW):
+        self.update_times = deque(maxlen=window)
+        self.render_times = deque(maxlen=window)
+        self.present_times = deque(maxlen=window)
+        self.frame_times = deque(maxlen=window)
+
+    def record(self, update_time, render_time, present_time, frame_time):
+        self.update_times.append(update_time)
+        self.render_times.append(render_time)
+        self.present_times.append(present_time)
+        self.frame_times.append(frame_time)
+
+    def __len__(self):
+        return len(self.frame_times)
+
+    def summary(self) -> dict:
+        """
+        Returns mean phase timings, mean and p95 frame time (all in ms) and
+        the frame rate implied by the mean frame time.
+        """
+        if not self.frame_times:
+            return {"update": 0.0, "render": 0.0, "present": 0.0, "frame": 0.0, "p95": 0.0, "fps": 0.0}
+
+        def mean_ms(samples):
+            return 1000 * sum(samples) / len(samples)
+
+        ordered = sorted(self.frame_times)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        frame = mean_ms(self.frame_times)
+        return {
+            "update": mean_ms(self.update_times),
+            "render": mean_ms(self.render_times),
+            "present": mean_ms(self.present_times),
+            "frame": frame,
+            "p95": 1000 * p95,
+            "fps": 1000 / frame if frame > 0 else 0.0,
+        }
+
+
+class ProfilerOverlay:
+    """
+    Draws the profiler summary in the bottom-left corner. The pixels under the
+    panel are saved before drawing and put back on the next frame, so games
+    that only redraw their dirty rects don't need to know the overlay exists.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.visible = False
+        self.font = None
+        self.saved = None
+        self.saved_rect = None
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def restore(self, screen):
+        """
+        Puts back whatever the panel covered last frame. Returns the rect that
+        changed, or None.
+        """
+        if self.saved is None:
+            return None
+        screen.blit(self.saved, self.saved_rect)
+        rect = self.saved_rect
+        self.saved = None
+        self.saved_rect = None
+        return rect
+
+    def draw(self, screen):
+        """
+        Draws the panel if visible. Returns the rect that changed, or None.
+        """
+        if not self.visible:
+            return None
+        if self.font is None:
+            self.font = pygame.font.SysFont("consolas", 14)
+
+        stats = self.profiler.summary()
+        lines = [
+            f"update  {stats['update']:6.2f} ms",
+            f"render  {stats['render']:6.2f} ms",
+            f"present {stats['present']:6.2f} ms",
+            f"frame   {stats['frame']:6.2f} ms",
+            f"p95     {stats['p95']:6.2f} ms",
+            f"fps     {stats['fps']:6.1f}",
+        ]
+        rendered = [self.font.render(text, True, OVERLAY_TEXT) for text in lines]
+        line_height = self.font.get_linesize()
+        width = max(surface.get_width() for surface in rendered) + 12
+        height = line_height * len(rendered) + 12
+
+        rect = pygame.Rect(0, 0, width, height)
+        rect.bottomleft = (6, screen.get_height() - 6)
+        rect = rect.clip(screen.get_rect())
+
+        self.saved = screen.subsurface(rect).copy()
+        self.saved_rect = rect
+
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        panel.fill(OVERLAY_BACKGROUND)
+        for i, surface in enumerate(rendered):
+            panel.blit(surface, (6, 6 + i * line_height))
+        screen.blit(panel, rect)
+        return rect
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """
+    Adds the runtime's command-line flags to a minigame's own parser.
+    """
+    parser.add_argument("--benchmark", action="store_true",
+                        help="run headless and unthrottled, then print frame timings")
+    parser.add_argument("--frames", type=int, default=BENCHMARK_FRAMES,
+                        help="number of frames to run with --benchmark")
+    return parser
+
+
+def parse_args(description: str = None) -> argparse.Namespace:
+    return add_arguments(argparse.ArgumentParser(description=description)).parse_args()
+
+
+def print_summary(profiler: FrameProfiler) -> None:
+    stats = profiler.summary()
+    print(f"Frames:  {len(profiler)}")
+    print(f"FPS:     {stats['fps']:.1f}")
+    print(f"Update:  {stats['update']:.3f} ms")
+    print(f"Render:  {stats['render']:.3f} ms")
+    print(f"Present: {stats['present']:.3f} ms")
+    print(f"Frame:   {stats['frame']:.3f} ms (p95 {stats['p95']:.3f} ms)")
+
+
+def run(game: Game, fps: int = 60, benchmark: bool = False, frames: int = BENCHMARK_FRAMES) -> FrameProfiler:
+    """
+    Runs `game` until it stops or the window is closed.
+
+    Simulation advances in fixed 1/UPDATE_RATE steps; `render` receives how far
+    the clock is into the next step (0..1) so it can interpolate. Only the rects
+    returned by `render` are pushed to the display. F3 toggles the profiler
+    overlay. With `benchmark` set, the loop runs headless without frame limiting,
+    advances exactly one step per frame and stops after `frames` frames.
+    """
+    if benchmark:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    pygame.init()
+    screen = pygame.display.set_mode(game.size)
+    pygame.display.set_caption(game.title)
+    clock = pygame.time.Clock()
+    game.setup(screen)
+    pygame.display.flip()
+
+    profiler = FrameProfiler(window=None if benchmark else PROFILER_WINDOW)
+    overlay = ProfilerOverlay(profiler)
+
+    dt = 1 / UPDATE_RATE
+    accumulator = 0.0
+    frame_count = 0
+    previous_time = time.perf_counter()
+
+    while game.running:
+        # Wall-clock time since the previous frame started, including the frame
+        # limiter's sleep and any vsync wait
+        frame_start = time.perf_counter()
+        frame_time = frame_start - previous_time
+        if benchmark:
+            accumulator += dt
+        else:
+            accumulator += min(frame_time, MAX_FRAME_TIME)
+        previous_time = frame_start
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.running = False
+            elif event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                overlay.toggle()
+            else:
+                game.handle_event(event)
+
+        # Update
+        while accumulator >= dt:
+            game.update(dt)
+            accumulator -= dt
+        update_end = time.perf_counter()
+
+        # Render
+        dirty = [overlay.restore(screen)]
+        rendered = game.render(screen, accumulator / dt)
+        render_end = time.perf_counter()
+
+        # Present
+        dirty.append(overlay.draw(screen))
+        if rendered is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update([rect for rect in rendered + dirty if rect])
+        present_end = time.perf_counter()
+
+        profiler.record(
+            update_end - frame_start,
+            render_end - update_end,
+            present_end - render_end,
+            frame_time
+        )
+
+        frame_count += 1
+        if benchmark:
+            if frame_count >= frames:
+                break
+        else:
+            clock.tick(fps)
+
+    pygame.quit()
+
+    if benchmark:
+        print_summary(profiler)
+    return profiler
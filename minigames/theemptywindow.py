@@ -1,23 +1,22 @@
-import pygame
 import sys
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((800, 600))
-    pygame.display.set_caption("Game 0 - Empty Window")
-    clock = pygame.time.Clock()
+import runtime
 
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+class EmptyWindow(runtime.Game):
+    title = "Game 0 - Empty Window"
+    size = (800, 600)
 
+    def setup(self, screen):
         screen.fill((0, 0, 0))  # black background
-        pygame.display.flip()
-        clock.tick(60)  # 60 FPS
 
-    pygame.quit()
+    def render(self, screen, alpha):
+        # Nothing changes after the first frame, so there is nothing to present.
+        # Benchmarking this window measures the runtime's own overhead.
+        return []
+
+def main():
+    args = runtime.parse_args("An empty window; the baseline for runtime overhead.")
+    runtime.run(EmptyWindow(), benchmark=args.benchmark, frames=args.frames)
     sys.exit()
 
 if __name__ == "__main__":
@@ -0,0 +1,393 @@
+import os
+import re
+import time
+import zlib
+import struct
+import argparse
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from gems import GEM_LABELS, UNKNOWN_LABEL, identify_gem_type, load_reference_images
+
+# A label's index in GEM_LABELS is its uint8 code in the log
+UNKNOWN_CODE = GEM_LABELS.index(UNKNOWN_LABEL)
+
+CHUNK_FRAMES = 512        # frames per compressed chunk; each chunk starts with a full keyframe
+COMPRESSION_LEVEL = 6
+
+MAGIC = b"BJ3L"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHB")           # magic, version, grid size
+CHUNK_HEADER = struct.Struct("<4sIII")         # chunk magic, frame count, raw size, compressed size
+CHUNK_MAGIC = b"CHNK"
+INDEX_MAGIC = b"BJ3I"
+TRAILER = struct.Struct("<QI4s")               # index offset, chunk count, index magic
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("first_frame", "<u4"),
+    ("last_frame", "<u4"),
+    ("frame_count", "<u4"),
+])
+
+NO_MOVE = (-1, -1, -1, -1)
+
+
+class LoggedFrame(NamedTuple):
+    frame_number: int
+    timestamp: float
+    grid: np.ndarray
+    move: Optional[Tuple[int, int, int, int]]
+
+
+def labels_to_grid(color_labels: list) -> np.ndarray:
+    """
+    Converts a 2D list of gem label letters (as produced by
+    capture_and_process_frame) into a uint8 code grid. Unrecognised
+    labels become UNKNOWN_CODE.
+    """
+    return np.array(
+        [[max(GEM_LABELS.find(label), UNKNOWN_CODE) for label in row] for row in color_labels],
+        dtype=np.uint8
+    )
+
+
+def grid_to_labels(grid: np.ndarray) -> list:
+    """
+    Converts a uint8 code grid back into a 2D list of gem label letters.
+    """
+    return [[GEM_LABELS[code] if code < len(GEM_LABELS) else GEM_LABELS[UNKNOWN_CODE] for code in row]
+            for row in grid]
+
+
+def encode_chunk(frame_numbers, timestamps, moves, grids) -> bytes:
+    """
+    Packs a run of frames into one compressed chunk. Each grid is stored as
+    its XOR against the previous frame (the first against zeros, making it
+    a keyframe): a bitmask of the cells that changed followed by only those
+    cells' XOR deltas.
+    """
+    frame_count = len(grids)
+    flat = np.asarray(grids, dtype=np.uint8).reshape(frame_count, -1)
+
+    delta = flat.copy()
+    delta[1:] ^= flat[:-1]
+    changed = delta != 0
+    masks = np.packbits(changed, axis=1, bitorder="little")
+
+    raw = b"".join([
+        np.asarray(frame_numbers, dtype="<u4").tobytes(),
+        np.asarray(timestamps, dtype="<f8").tobytes(),
+        np.asarray(moves, dtype=np.int8).reshape(frame_count, 4).tobytes(),
+        masks.tobytes(),
+        delta[changed].tobytes(),
+    ])
+    compressed = zlib.compress(raw, COMPRESSION_LEVEL)
+    return CHUNK_HEADER.pack(CHUNK_MAGIC, frame_count, len(raw), len(compressed)) + compressed
+
+
+def decode_chunk(payload: bytes, frame_count: int, grid_size: int) -> tuple:
+    """
+    Inverse of encode_chunk (without the header). Returns frame numbers,
+    timestamps, moves and a (frame_count, grid_size, grid_size) grid array.
+    """
+    cells = grid_size * grid_size
+    mask_bytes = (cells + 7) // 8
+    raw = zlib.decompress(payload)
+
+    offset = 0
+
+    def take(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(raw, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    frame_numbers = take("<u4", frame_count)
+    timestamps = take("<f8", frame_count)
+    moves = take(np.int8, frame_count * 4).reshape(frame_count, 4)
+    masks = take(np.uint8, frame_count * mask_bytes).reshape(frame_count, mask_bytes)
+    changed = np.unpackbits(masks, axis=1, count=cells, bitorder="little").astype(bool)
+    values = take(np.uint8, int(changed.sum()))
+
+    # Scatter the deltas, then a running XOR down the frames rebuilds every grid
+    grids = np.zeros((frame_count, cells), dtype=np.uint8)
+    grids[changed] = values
+    np.bitwise_xor.accumulate(grids, axis=0, out=grids)
+    grids = grids.reshape(frame_count, grid_size, grid_size)
+
+    return frame_numbers, timestamps, moves, grids
+
+
+class SessionLogWriter:
+    """
+    Appends per-frame board states to a session log. Frames are buffered
+    and written as independently decodable compressed chunks; an index of
+    chunk offsets is appended on close so readers can seek straight to any
+    frame. A log that was never closed (e.g. after a crash) is still
+    readable up to its last complete chunk.
+    """
+
+    def __init__(self, path: str, grid_size: int = 8, chunk_frames: int = CHUNK_FRAMES):
+        self.path = path
+        self.grid_size = grid_size
+        self.chunk_frames = chunk_frames
+        self.file = open(path, "wb")
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, grid_size))
+
+        self.index = []
+        self.next_frame_number = 0
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        self.frame_numbers = []
+        self.timestamps = []
+        self.moves = []
+        self.grids = []
+
+    def write(self, grid, timestamp: float = None, move: tuple = None, frame_number: int = None) -> None:
+        """
+        Records one frame.
+
+        Args:
+            grid: (grid_size, grid_size) uint8 label codes, see labels_to_grid.
+            timestamp (float): Capture time in seconds; defaults to now.
+            move (tuple): The move chosen on this frame as (row1, col1, row2, col2), or None.
+            frame_number (int): Defaults to one past the previous frame.
+        """
+        grid = np.asarray(grid, dtype=np.uint8)
+        if grid.shape != (self.grid_size, self.grid_size):
+            raise ValueError(f"Expected a {self.grid_size}x{self.grid_size} grid, got {grid.shape}")
+
+        if frame_number is None:
+            frame_number = self.next_frame_number
+        self.next_frame_number = frame_number + 1
+
+        self.frame_numbers.append(frame_number)
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
+        self.moves.append(NO_MOVE if move is None else move)
+        self.grids.append(grid)
+
+        if len(self.grids) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.grids:
+            return
+        offset = self.file.tell()
+        self.file.write(encode_chunk(self.frame_numbers, self.timestamps, self.moves, self.grids))
+        self.file.flush()
+        self.index.append((offset, self.frame_numbers[0], self.frame_numbers[-1], len(self.grids)))
+        self._reset_buffer()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.index, dtype=INDEX_DTYPE).tobytes())
+        self.file.write(TRAILER.pack(index_offset, len(self.index), INDEX_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SessionLogReader:
+    """
+    Random-access reader for session logs. The whole file is read into
+    memory up front (it is small); chunks are decompressed on demand and
+    the most recently used chunk is cached.
+
+    Frames can be fetched by position (`reader[i]`) or by the frame number
+    they were recorded with (`reader.find(n)`), and `grids()` decodes the
+    whole session into one (frames, grid_size, grid_size) array.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.data = f.read()
+
+        magic, version, self.grid_size = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported session log version {version}")
+
+        self.index = self._read_index()
+        self.chunk_starts = np.concatenate(([0], np.cumsum(self.index["frame_count"], dtype=np.int64)))
+        self._cached_chunk = None
+        self._cached = None
+
+    def _read_index(self) -> np.ndarray:
+        if len(self.data) >= FILE_HEADER.size + TRAILER.size:
+            index_offset, chunk_count, magic = TRAILER.unpack_from(self.data, len(self.data) - TRAILER.size)
+            if magic == INDEX_MAGIC:
+                return np.frombuffer(self.data, dtype=INDEX_DTYPE, count=chunk_count, offset=index_offset)
+        return self._scan_chunks()
+
+    def _scan_chunks(self) -> np.ndarray:
+        """
+        Rebuilds the chunk index by walking the chunk headers, for logs
+        whose writer was never closed. A truncated final chunk is dropped.
+        """
+        entries = []
+        offset = FILE_HEADER.size
+        while offset + CHUNK_HEADER.size <= len(self.data):
+            magic, frame_count, _, compressed_size = CHUNK_HEADER.unpack_from(self.data, offset)
+            end = offset + CHUNK_HEADER.size + compressed_size
+            if magic != CHUNK_MAGIC or end > len(self.data):
+                break
+            frame_numbers = decode_chunk(self._payload(offset), frame_count, self.grid_size)[0]
+            entries.append((offset, frame_numbers[0], frame_numbers[-1], frame_count))
+            offset = end
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def _payload(self, offset: int) -> bytes:
+        _, _, _, compressed_size = CHUNK_HEADER.unpack_from(self.data, offset)
+        start = offset + CHUNK_HEADER.size
+        return self.data[start:start + compressed_size]
+
+    def chunk(self, chunk_number: int) -> tuple:
+        """
+        Returns the decoded (frame_numbers, timestamps, moves, grids) of one chunk.
+        """
+        if self._cached_chunk != chunk_number:
+            entry = self.index[chunk_number]
+            self._cached = decode_chunk(self._payload(int(entry["offset"])), int(entry["frame_count"]), self.grid_size)
+            self._cached_chunk = chunk_number
+        return self._cached
+
+    def __len__(self) -> int:
+        return int(self.chunk_starts[-1])
+
+    def __getitem__(self, position: int) -> LoggedFrame:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("frame position out of range")
+
+        chunk_number = int(np.searchsorted(self.chunk_starts, position, side="right")) - 1
+        frame_numbers, timestamps, moves, grids = self.chunk(chunk_number)
+        i = position - int(self.chunk_starts[chunk_number])
+
+        move = tuple(int(v) for v in moves[i])
+        return LoggedFrame(int(frame_numbers[i]), float(timestamps[i]), grids[i].copy(),
+                           None if move == NO_MOVE else move)
+
+    def find(self, frame_number: int) -> int:
+        """
+        Returns the position of the frame recorded as `frame_number`. Frame
+        numbers are assumed to increase through the log, as main.py writes them.
+        Raises KeyError if it was not logged.
+        """
+        chunk_number = int(np.searchsorted(self.index["first_frame"], frame_number, side="right")) - 1
+        if chunk_number >= 0 and frame_number <= self.index["last_frame"][chunk_number]:
+            frame_numbers = self.chunk(chunk_number)[0]
+            i = int(np.searchsorted(frame_numbers, frame_number))
+            if i < len(frame_numbers) and frame_numbers[i] == frame_number:
+                return int(self.chunk_starts[chunk_number]) + i
+        raise KeyError(f"Frame {frame_number} is not in the log")
+
+    def frame(self, frame_number: int) -> LoggedFrame:
+        return self[self.find(frame_number)]
+
+    def read_all(self) -> tuple:
+        """
+        Decodes every chunk. Returns frame numbers, timestamps, moves (-1 rows
+        where no move was chosen) and grids as arrays covering the session.
+        """
+        if len(self.index) == 0:
+            return (np.empty(0, "<u4"), np.empty(0, "<f8"), np.empty((0, 4), np.int8),
+                    np.empty((0, self.grid_size, self.grid_size), np.uint8))
+        parts = [self.chunk(i) for i in range(len(self.index))]
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def grids(self) -> np.ndarray:
+        return self.read_all()[3]
+
+
+def convert_frame_dumps(frames_dir: str, log_path: str, reference_dir: str = None, grid_size: int = 8) -> int:
+    """
+    Rebuilds a session log from the `frames/frames_<n>/square_<row>_<col>.png`
+    dumps written by capture_and_process_frame. With `reference_dir`, each
+    square is classified with gems.identify_gem_type; otherwise, and for
+    missing squares, cells are logged as unknown. The directory's
+    modification time stands in for the capture timestamp.
+
+    Args:
+        frames_dir (str): The root directory containing the frames directories.
+        log_path (str): Where to write the session log.
+        reference_dir (str): Folder of {gem_color}_example/ reference images, or None.
+        grid_size (int): Cells per side of the board.
+
+    Returns:
+        int: The number of frames converted.
+    """
+    import cv2
+
+    reference_colors = load_reference_images(reference_dir) if reference_dir else {}
+    pattern = re.compile(r"frames_(\d+)$")
+
+    with os.scandir(frames_dir) as entries:
+        frame_dirs = sorted(
+            (int(match.group(1)), entry.path, entry.stat().st_mtime)
+            for entry in entries
+            if entry.is_dir() and (match := pattern.match(entry.name))
+        )
+
+    with SessionLogWriter(log_path, grid_size=grid_size) as log:
+        for frame_number, frame_dir, timestamp in frame_dirs:
+            color_labels = [[UNKNOWN_LABEL] * grid_size for _ in range(grid_size)]
+            for row in range(grid_size):
+                for col in range(grid_size):
+                    square_img = cv2.imread(os.path.join(frame_dir, f"square_{row}_{col}.png"))
+                    if square_img is not None:
+                        color_labels[row][col] = identify_gem_type(square_img, reference_colors)
+            log.write(labels_to_grid(color_labels), timestamp, frame_number=frame_number)
+
+    return len(frame_dirs)
+
+
+def print_log_info(log_path: str) -> None:
+    start_time = time.perf_counter()
+    reader = SessionLogReader(log_path)
+    frame_numbers, timestamps, moves, grids = reader.read_all()
+    load_time = time.perf_counter() - start_time
+
+    print(f"Frames:    {len(reader)} in {len(reader.index)} chunks")
+    print(f"File size: {os.path.getsize(log_path) / 1024:.1f} KiB "
+          f"({os.path.getsize(log_path) / max(len(reader), 1):.2f} bytes/frame)")
+    print(f"Load time: {load_time * 1000:.1f} ms")
+    if len(reader):
+        print(f"Duration:  {timestamps[-1] - timestamps[0]:.1f} s "
+              f"(frames {frame_numbers[0]}-{frame_numbers[-1]})")
+        print(f"Moves:     {int((moves[:, 0] >= 0).sum())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bejeweled 3 session board-state logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="build a session log from frames/ square dumps")
+    convert.add_argument("frames_dir")
+    convert.add_argument("log_path")
+    convert.add_argument("--reference-dir",
+                         help="classify squares by colour against {gem_color}_example/ references here")
+
+    info = commands.add_parser("info", help="print a session log's size and load time")
+    info.add_argument("log_path")
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        count = convert_frame_dumps(args.frames_dir, args.log_path, args.reference_dir)
+        print(f"Converted {count} frames into {args.log_path}")
+    elif args.command == "info":
+        print_log_info(args.log_path)
+
+
+if __name__ == "__main__":
+    main()
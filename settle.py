@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+# Config
+QUIET_PERIOD = 0.1        # seconds without motion before the board counts as stable
+MOTION_THRESHOLD = 4.0    # mean absolute grey-level change in a cell that counts as motion
+CELL_SAMPLES = 4          # downsampled pixels per cell side; 4 turns a 1026px grid into 32x32
+PIXEL_STRIDE = 4          # sample every 4th captured pixel; plenty to spot a moving gem
+
+
+class SettleDetector:
+    """
+    Decides when the board has stopped moving, using whole-grid signals
+    that are far cheaper than classifying 64 cells.
+
+    Each frame is shrunk to a few pixels per cell and differenced against
+    the previous one. A column's motion energy is the largest mean
+    difference of any cell in it: falling gems and cascades move down
+    columns, while small sparkles average out. Once no column has moved
+    for `quiet_period` seconds, `update` returns True exactly once (the
+    "board stable" event). It then stays quiet until the board moves and
+    settles again.
+    """
+
+    def __init__(self, grid_size: int = 8, quiet_period: float = QUIET_PERIOD,
+                 motion_threshold: float = MOTION_THRESHOLD, cell_samples: int = CELL_SAMPLES):
+        self.grid_size = grid_size
+        self.quiet_period = quiet_period
+        self.motion_threshold = motion_threshold
+        self.cell_samples = cell_samples
+        self.sample_size = grid_size * cell_samples
+
+        self.previous = None
+        self.column_energy = np.zeros(grid_size)
+        self.stable = False
+        self.motion_start = None
+        self.last_motion = None
+
+        # Latency of the latest settle event; None for the startup board
+        self.last_latency = None
+
+        # Per settle event: event time minus last moving frame, and minus first moving frame
+        self.settle_latencies = []
+        self.settle_durations = []
+
+    def measure(self, img: np.ndarray) -> np.ndarray:
+        """
+        Returns the motion energy of each board column between the previous
+        frame and `img` (a BGR image of the whole grid). The first frame only
+        becomes the baseline and reports no motion.
+        """
+        # Cropping to a multiple of the sample size keeps INTER_AREA on its fast integer-ratio path
+        height = img.shape[0] - img.shape[0] % self.sample_size
+        width = img.shape[1] - img.shape[1] % self.sample_size
+        small = cv2.resize(img[:height:PIXEL_STRIDE, :width:PIXEL_STRIDE],
+                           (self.sample_size, self.sample_size), interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+        if self.previous is None:
+            energy = np.zeros(self.grid_size)
+        else:
+            diff = np.abs(small - self.previous)
+            cell_energy = diff.reshape(self.grid_size, self.cell_samples,
+                                       self.grid_size, self.cell_samples).mean(axis=(1, 3))
+            energy = cell_energy.max(axis=0)
+        self.previous = small
+        return energy
+
+    def moving_columns(self) -> np.ndarray:
+        """
+        Returns the indices of columns that moved on the last frame.
+        """
+        return np.flatnonzero(self.column_energy > self.motion_threshold)
+
+    def update(self, img: np.ndarray, timestamp: float) -> bool:
+        """
+        Feeds one frame captured at `timestamp` (seconds). Returns True on the
+        frame where the board becomes stable, False otherwise.
+
+        The first frame starts the quiet period without opening a motion
+        episode. The board that is already on screen at startup still gets its
+        stable event, but that event is left out of the latency statistics and
+        its `last_latency` is None.
+        """
+        first_frame = self.previous is None
+        self.column_energy = self.measure(img)
+        if first_frame:
+            self.stable = False
+            self.last_motion = timestamp
+            return False
+
+        if self.column_energy.max() > self.motion_threshold:
+            if self.stable or self.motion_start is None:
+                self.motion_start = timestamp
+            self.stable = False
+            self.last_motion = timestamp
+            return False
+
+        if self.stable or timestamp - self.last_motion < self.quiet_period:
+            return False
+
+        self.stable = True
+        if self.motion_start is None:
+            self.last_latency = None
+        else:
+            self.last_latency = timestamp - self.last_motion
+            self.settle_latencies.append(self.last_latency)
+            self.settle_durations.append(timestamp - self.motion_start)
+        return True
+
+    def latency_stats(self) -> dict:
+        """
+        Summarises settle events in milliseconds. `latency` is how long after
+        the last moving frame the event fired; `duration` runs from the first
+        moving frame, i.e. the whole animation plus the latency.
+        """
+        stats = {"events": len(self.settle_latencies)}
+        for name, samples in (("latency", self.settle_latencies), ("duration", self.settle_durations)):
+            values = 1000 * np.array(samples) if samples else np.zeros(1)
+            stats[f"{name}_mean"] = float(values.mean())
+            stats[f"{name}_p50"] = float(np.percentile(values, 50))
+            stats[f"{name}_p95"] = float(np.percentile(values, 95))
+            stats[f"{name}_max"] = float(values.max())
+        return stats
+
+    def print_stats(self) -> None:
+        stats = self.latency_stats()
+        print(f"Settle events: {stats['events']}")
+        print(f"Settle latency:  mean {stats['latency_mean']:.1f} ms, p50 {stats['latency_p50']:.1f} ms, "
+              f"p95 {stats['latency_p95']:.1f} ms, max {stats['latency_max']:.1f} ms")
+        print(f"Settle duration: mean {stats['duration_mean']:.1f} ms, p50 {stats['duration_p50']:.1f} ms, "
+              f"p95 {stats['duration_p95']:.1f} ms, max {stats['duration_max']:.1f} ms")